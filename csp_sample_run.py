@@ -27,11 +27,9 @@ varDoms = []
 for v in [w, x, y, z]:
     varDoms.append(v.domain())    
 
-sat_tuples = []
-for t in itertools.product(*varDoms):
-    #NOTICE use of * to convert the list v to a sequence of arguments to product
-    if w_eq_sum_x_y_z(t):
-        sat_tuples.append(t)
+#NOTICE use of * to convert the list v to a sequence of arguments to product.
+#The generator streams the tuples into the constraint without building a list
+sat_tuples = (t for t in itertools.product(*varDoms) if w_eq_sum_x_y_z(t))
 
 c2.add_satisfying_tuples(sat_tuples)
 
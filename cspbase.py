@@ -11,7 +11,7 @@ import functools
       added but NOT deleted from.
       
       To support constraint propagation, the class also maintains a
-      set of flags to indicate if a value is still in its current domain.
+      bitmask to indicate if a value is still in its current domain.
       So one can remove values, add them back, and query if they are 
       still current. 
 
@@ -45,8 +45,8 @@ class Variable:
 
        The variable object offers two types of functionality to support
        search. 
-       (a) It has a current domain, implimented as a set of flags 
-           determining which domain values are "current", i.e., unpruned.
+       (a) It has a current domain, implimented as an integer bitmask
+           (bit i set iff dom[i] is "current", i.e., unpruned).
            - you can prune a value, and restore it.
            - you can obtain a list of values in the current domain, or count
              how many are still there
@@ -81,16 +81,22 @@ class Variable:
         '''
         self.name = name                #text name for variable
         self.dom = list(domain)         #Make a copy of passed domain
-        self.curdom = [True] * len(domain)      #using list
+        self.dom_index = dict()         #value -> index in dom
+        for i, val in enumerate(self.dom):
+            self.dom_index.setdefault(val, i)
+        self.curdom_mask = (1 << len(self.dom)) - 1    #bit i <-> dom[i]
         #for bt_search
         self.assignedValue = None
+        #constraints over this variable, told when it is (un)assigned
+        self.cons = []
 
     def add_domain_values(self, values):
         '''Add additional domain values to the domain
            Removals not supported removals'''
         for val in values: 
+            self.dom_index.setdefault(val, len(self.dom))
+            self.curdom_mask |= 1 << len(self.dom)
             self.dom.append(val)
-            self.curdom.append(True)
 
     def domain_size(self):
         '''Return the size of the (permanent) domain'''
@@ -106,11 +112,11 @@ class Variable:
 
     def prune_value(self, value):
         '''Remove value from CURRENT domain'''
-        self.curdom[self.value_index(value)] = False
+        self.curdom_mask &= ~(1 << self.value_index(value))
 
     def unprune_value(self, value):
         '''Restore value to CURRENT domain'''
-        self.curdom[self.value_index(value)] = True
+        self.curdom_mask |= 1 << self.value_index(value)
 
     def cur_domain(self):
         '''return list of values in CURRENT domain (if assigned 
@@ -119,40 +125,41 @@ class Variable:
         if self.is_assigned():
             vals.append(self.get_assigned_value())
         else:
-            for i, val in enumerate(self.dom):
-                if self.curdom[i]:
-                    vals.append(val)
+            m = self.curdom_mask
+            while m:
+                b = m & -m    #lowest set bit
+                vals.append(self.dom[b.bit_length() - 1])
+                m ^= b
         return vals
 
     def in_cur_domain(self, value):
         '''check if value is in CURRENT domain (without constructing list)
            if assigned only assigned value is viewed as being in current 
            domain'''
-        if not value in self.dom:
+        if not value in self.dom_index:
             return False
         if self.is_assigned():
             return value == self.get_assigned_value()
         else:
-            return self.curdom[self.value_index(value)]
+            return (self.curdom_mask >> self.value_index(value)) & 1 == 1
 
     def cur_domain_size(self):
         '''Return the size of the variables domain (without construcing list)'''
         if self.is_assigned():
             return 1
         else:
-            return(sum(1 for v in self.curdom if v))
+            return self.curdom_mask.bit_count()
 
     def restore_curdom(self):
         '''return all values back into CURRENT domain'''
-        for i in range(len(self.curdom)):
-            self.curdom[i] = True
+        self.curdom_mask = (1 << len(self.dom)) - 1
 
     #
     #methods for assigning and unassigning
     #
 
     def is_assigned(self):
-        return self.assignedValue != None
+        return self.assignedValue is not None
     
     def assign(self, value):
         '''Used by bt_search. When we assign we remove all other values
@@ -165,6 +172,8 @@ class Variable:
             return
 
         self.assignedValue = value
+        for c in self.cons:
+            c.n_unasgn -= 1
 
     def unassign(self):
         '''Used by bt_search. Unassign and restore old curdom'''
@@ -172,6 +181,8 @@ class Variable:
             print("ERROR: trying to unassign variable", self, " not yet assigned")
             return
         self.assignedValue = None
+        for c in self.cons:
+            c.n_unasgn += 1
 
     def get_assigned_value(self):
         '''return assigned value...returns None if is unassigned'''
@@ -184,7 +195,7 @@ class Variable:
     def value_index(self, value):
         '''Domain values need not be numbers, so return the index
            in the domain list of a variable value'''
-        return self.dom.index(value)
+        return self.dom_index[value]
 
     def __repr__(self):
         return("Var-{}".format(self.name))
@@ -196,7 +207,7 @@ class Variable:
         '''Also print the variable domain and current domain'''
         print("Var--\"{}\": Dom = {}, CurDom = {}".format(self.name, 
                                                              self.dom, 
-                                                             self.curdom))
+                                                             self.cur_domain()))
 class Constraint: 
     '''Class for defining constraints variable objects specifes an
        ordering over variables.  This ordering is used when calling
@@ -221,6 +232,17 @@ class Constraint:
 
         self.scope = list(scope)
         self.name = name
+        #number of unassigned variables in the scope, kept up to date by
+        #the variables' assign and unassign
+        self.n_unasgn = 0
+        for v in self.scope:
+            v.cons.append(self)
+            if not v.is_assigned():
+                self.n_unasgn += 1
+        #Maps each satisfying tuple to the positions of its values in
+        #the domains of the scope variables (None if a value is not in
+        #the domain), so supports can be validated against the current
+        #domain bitmasks without searching the domains.
         self.sat_tuples = dict()
 
         #The next object data item 'sup_tuples' will be used to help
@@ -229,12 +251,31 @@ class Constraint:
         #pair.
         self.sup_tuples = dict()
 
+        #For binary constraints 'sup_masks' maps each variable/value pair
+        #to a bitmask (same layout as Variable.curdom_mask) of the values
+        #of the other variable that support it, so has_support is a
+        #single AND instead of a scan of sup_tuples. None if not binary,
+        #or if some tuple value is not in its variable's domain.
+        self.sup_masks = dict() if len(self.scope) == 2 else None
+
     def add_satisfying_tuples(self, tuples):
-        '''We specify the constraint by adding its complete list of satisfying tuples.'''
+        '''We specify the constraint by adding its complete list of satisfying tuples.
+           Any iterable (e.g., a generator) can be passed; it is consumed
+           once, so large tables need not be built as a list first.'''
+        if self.sup_masks is not None:
+            v0, v1 = self.scope
         for x in tuples:
             t = tuple(x)  #ensure we have an immutable tuple
-            if not t in self.sat_tuples:
-                self.sat_tuples[t] = True
+            if t in self.sat_tuples:
+                continue
+            idx = tuple(var.dom_index.get(val) for var, val in zip(self.scope, t))
+            self.sat_tuples[t] = idx
+            if self.sup_masks is not None:
+                if None in idx:
+                    self.sup_masks = None
+                else:
+                    self.sup_masks[(v0, t[0])] = self.sup_masks.get((v0, t[0]), 0) | (1 << idx[1])
+                    self.sup_masks[(v1, t[1])] = self.sup_masks.get((v1, t[1]), 0) | (1 << idx[0])
 
             #now put t in as a support for all of the variable values in it
             for i, val in enumerate(t):
@@ -258,11 +299,7 @@ class Constraint:
 
     def get_n_unasgn(self):
         '''return the number of unassigned variables in the constraint's scope'''
-        n = 0
-        for v in self.scope:
-            if not v.is_assigned():
-                n = n + 1
-        return n
+        return self.n_unasgn
 
     def get_unasgn_vars(self): 
         '''return list of unassigned variables in constraint's scope. Note
@@ -278,6 +315,15 @@ class Constraint:
            of assignments satisfying the constraint where each value is
            still in the corresponding variables current domain
         '''
+        if self.sup_masks is not None:
+            if not var.in_cur_domain(val):
+                return False
+            x, y = self.scope
+            other = y if var is x else x
+            if other.is_assigned():
+                w = other.get_assigned_value()
+                return self.check([val, w] if var is x else [w, val])
+            return (other.curdom_mask & self.sup_masks.get((var, val), 0)) != 0
         if (var, val) in self.sup_tuples:
             for t in self.sup_tuples[(var, val)]:
                 if self.tuple_is_valid(t):
@@ -287,14 +333,207 @@ class Constraint:
     def tuple_is_valid(self, t):
         '''Internal routine. Check if every value in tuple is still in
            corresponding variable domains'''
-        for i, var in enumerate(self.scope):
-            if not var.in_cur_domain(t[i]):
+        for var, val, idx in zip(self.scope, t, self.sat_tuples[t]):
+            if var.assignedValue is not None:
+                if val != var.assignedValue:
+                    return False
+            elif idx is None:
+                #value was not in the domain when the tuple was added
+                if not var.in_cur_domain(val):
+                    return False
+            elif not (var.curdom_mask >> idx) & 1:
                 return False
         return True
 
     def __str__(self):
         return("{}({})".format(self.name,[var.name for var in self.scope]))
 
+class BinaryConstraint(Constraint):
+    '''Base class for binary constraints defined by their check function
+       rather than a table of satisfying tuples. Subclasses define check.
+
+       On creation, sup_masks is filled from check for every value of
+       each variable, so has_support uses the same single AND test as a
+       binary table constraint. Domain values added to the variables
+       afterwards are not seen.'''
+
+    def __init__(self, name, scope):
+        Constraint.__init__(self, name, scope)
+        x, y = self.scope
+        for val in x.dom:
+            self.sup_masks[(x, val)] = self.support_mask(y, lambda w: [val, w])
+        for val in y.dom:
+            self.sup_masks[(y, val)] = self.support_mask(x, lambda w: [w, val])
+
+    def support_mask(self, other, vals_with):
+        '''Internal routine. Bitmask of the values w of other for which
+           vals_with(w) satisfies the constraint'''
+        mask = 0
+        for i, w in enumerate(other.dom):
+            if self.check(vals_with(w)):
+                mask |= 1 << i
+        return mask
+
+    def add_satisfying_tuples(self, tuples):
+        '''Satisfying tuples are implicit for a binary constraint given by check'''
+        print("ERROR: trying to add satisfying tuples to constraint", self)
+
+class NotEqualConstraint(BinaryConstraint):
+    '''Binary constraint scope[0] != scope[1]'''
+
+    def check(self, vals):
+        return vals[0] != vals[1]
+
+class LessThanConstraint(BinaryConstraint):
+    '''Binary constraint scope[0] < scope[1]'''
+
+    def check(self, vals):
+        return vals[0] < vals[1]
+
+class AllDiffConstraint(Constraint):
+    '''All-different constraint over an arbitrary scope. Instead of
+       storing the (factorial sized) table of satisfying tuples the
+       constraint is checked directly, and support for a variable value
+       pair is found by testing whether the remaining variables can still
+       be matched to distinct values of their current domains.'''
+
+    def add_satisfying_tuples(self, tuples):
+        '''Satisfying tuples are implicit for an all-different constraint'''
+        print("ERROR: trying to add satisfying tuples to all-diff constraint", self)
+
+    def check(self, vals):
+        '''Return true if and only if all of the values are distinct'''
+        return len(set(vals)) == len(vals)
+
+    def has_support(self, var, val):
+        '''Test if var = val can be extended to an assignment of distinct
+           values to every other variable in the scope, with each value
+           taken from the corresponding variable's current domain. This is
+           a bipartite matching problem between variables and values.
+        '''
+        if not var.in_cur_domain(val):
+            return False
+        match = dict()  #value -> variable currently matched to it
+        for v in self.scope:
+            if v is not var:
+                if not self.augment(v, val, match, set()):
+                    return False
+        return True
+
+    def augment(self, var, taken, match, visited):
+        '''Internal routine. Look for an augmenting path matching var to a
+           value of its current domain (other than taken) by re-matching
+           previously matched variables. Updates match and returns True
+           on success.'''
+        for val in var.cur_domain():
+            if val == taken or val in visited:
+                continue
+            visited.add(val)
+            if not val in match or self.augment(match[val], taken, match, visited):
+                match[val] = var
+                return True
+        return False
+
+    def unsupported_values(self):
+        '''Find every value of an unassigned variable in the scope that has
+           no support, all at once, using Regin's filtering algorithm:
+           compute a maximum matching between the variables and values
+           of their current domains, then a variable value pair is
+           supported iff it is in the matching, lies on an alternating
+           path starting at an unmatched value, or lies on an alternating
+           cycle (its variable and value are in the same strongly
+           connected component of the matching graph).
+
+           Returns a dict mapping each unassigned variable to the list of
+           its unsupported values (variables with none are omitted).'''
+        doms = [v.cur_domain() for v in self.scope]
+        match = dict()  #value -> variable index
+        var_match = dict()  #variable index -> value
+        for i in range(len(self.scope)):
+            if not self.match_index(i, doms, match, set()):
+                #no complete matching: nothing in the scope is supported
+                return dict((v, doms[i]) for i, v in enumerate(self.scope)
+                            if not v.is_assigned() and doms[i])
+        for val, i in match.items():
+            var_match[i] = val
+
+        #Graph nodes are (0, i) for variable i and (1, val) for values.
+        #Matching edges go variable -> value, all others value -> variable.
+        succ = dict()
+        for i, dom in enumerate(doms):
+            succ[(0, i)] = [(1, var_match[i])]
+            for val in dom:
+                succ.setdefault((1, val), [])
+                if val != var_match[i]:
+                    succ[(1, val)].append((0, i))
+
+        #values reachable by alternating paths from unmatched values
+        reached = set()
+        stack = [(1, val) for dom in doms for val in dom if not val in match]
+        while stack:
+            node = stack.pop()
+            if node in reached:
+                continue
+            reached.add(node)
+            stack.extend(succ[node])
+
+        comp = self.scc(succ)
+        unsupported = dict()
+        for i, var in enumerate(self.scope):
+            if var.is_assigned():
+                continue
+            for val in doms[i]:
+                if val == var_match[i] or (1, val) in reached \
+                   or comp[(0, i)] == comp[(1, val)]:
+                    continue
+                unsupported.setdefault(var, []).append(val)
+        return unsupported
+
+    def match_index(self, i, doms, match, visited):
+        '''Internal routine. Augmenting path step for unsupported_values,
+           over variable indices and the precomputed domains doms.'''
+        for val in doms[i]:
+            if val in visited:
+                continue
+            visited.add(val)
+            if not val in match or self.match_index(match[val], doms, match, visited):
+                match[val] = i
+                return True
+        return False
+
+    def scc(self, succ):
+        '''Internal routine. Tarjan's algorithm: map every node of the
+           graph given by the successor lists succ to the id of its
+           strongly connected component'''
+        index = dict()
+        low = dict()
+        comp = dict()
+        stack = []
+        on_stack = set()
+
+        def visit(node):
+            index[node] = low[node] = len(index)
+            stack.append(node)
+            on_stack.add(node)
+            for nxt in succ[node]:
+                if not nxt in index:
+                    visit(nxt)
+                    low[node] = min(low[node], low[nxt])
+                elif nxt in on_stack:
+                    low[node] = min(low[node], index[nxt])
+            if low[node] == index[node]:
+                while True:
+                    w = stack.pop()
+                    on_stack.discard(w)
+                    comp[w] = index[node]
+                    if w == node:
+                        break
+
+        for node in succ:
+            if not node in index:
+                visit(node)
+        return comp
+
 class CSP:
     '''Class for packing up a set of variables into a CSP problem.
        Contains various utility routines for accessing the problem.
@@ -308,7 +547,7 @@ class CSP:
         self.name = name
         self.vars = []
         self.cons = []
-        self.vars_to_cons = dict()
+        self.vars_to_cons = dict()  #var -> list of constraints over var
         for v in vars:
             self.add_var(v)
 
@@ -326,13 +565,14 @@ class CSP:
     def add_constraint(self,c):
         '''Add constraint to CSP. Note that all variables in the 
            constraints scope must already have been added to the CSP'''
-        if not type(c) is Constraint:
+        if not isinstance(c, Constraint):
             print("Trying to add non constraint ", c, " to CSP object")
         else:
             for v in c.scope:
                 if not v in self.vars_to_cons:
                     print("Trying to add constraint ", c, " with unknown variables to CSP object")
                     return
+            for v in c.scope:
                 self.vars_to_cons[v].append(c)
             self.cons.append(c)
 
@@ -341,8 +581,9 @@ class CSP:
         return self.cons
         
     def get_cons_with_var(self, var):
-        '''return list of constraints that include var in their scope'''
-        return list(self.vars_to_cons[var])
+        '''return list of constraints that include var in their scope.
+           The CSP's own list is returned, not a copy: do not modify it'''
+        return self.vars_to_cons[var]
 
     def get_all_vars(self):
         '''return list of variables in the CSP'''
@@ -16,6 +16,8 @@ cell of the Futoshiki puzzle.
 1. futoshiki_csp_model_1 (worth 20/100 marks)
     - A model of a Futoshiki grid built using only 
       binary not-equal constraints for both the row and column constraints.
+      With use_alldiff=True each row and column also gets an all-different
+      constraint, which prop_GAC propagates more strongly than the pairs.
 
 2. futoshiki_csp_model_2 (worth 20/100 marks)
     - A model of a Futoshiki grid built using only n-ary 
@@ -24,19 +26,68 @@ cell of the Futoshiki puzzle.
 '''
 
 from cspbase import *
-import itertools
 
 
-def futoshiki_csp_model_1(futo_grid):
+def futoshiki_domains(futo_grid):
+    """
+    Reduce the initial domains of the cells before search: a filled cell
+    gets only its value, which is removed from the other cells of its row
+    and column, then one sweep over the inequalities bounds each side by
+    its neighbour's domain. The domains are permanent (bt_search restores
+    current domains before searching), so this only removes values that
+    cannot appear in any solution.
+
+    :param futo_grid: fukoshiki grid, 2d array format specified in handout
+    :return: 2d list of domains, indexed [row][col]
+    """
+    board_size = (len(futo_grid[0]) + 1) // 2
+    fixed = [[futo_grid[row_idx][col_idx * 2] for col_idx in range(board_size)]
+             for row_idx in range(board_size)]
+    domains = []
+    for row_idx in range(board_size):
+        domains_row = []
+        for col_idx in range(board_size):
+            item = fixed[row_idx][col_idx]
+            if item != 0:
+                # a given outside 1..N leaves the cell with no values
+                domains_row.append([item] if 1 <= item <= board_size else [])
+            else:
+                # values already placed in the same row or column
+                taken = set(fixed[row_idx])
+                taken.update(fixed[r][col_idx] for r in range(board_size))
+                domains_row.append([v for v in range(1, board_size + 1) if v not in taken])
+        domains.append(domains_row)
+
+    # one sweep over the inequalities between horizontal neighbours
+    for row_idx in range(board_size):
+        for col_idx in range(board_size - 1):
+            item = futo_grid[row_idx][col_idx * 2 + 1]
+            if item == '<':
+                small, big = col_idx, col_idx + 1
+            elif item == '>':
+                small, big = col_idx + 1, col_idx
+            else:
+                continue
+            small_dom = domains[row_idx][small]
+            big_dom = domains[row_idx][big]
+            if small_dom and big_dom:
+                domains[row_idx][small] = [v for v in small_dom if v < max(big_dom)]
+                domains[row_idx][big] = [v for v in big_dom if v > min(small_dom)]
+    return domains
+
+
+def futoshiki_csp_model_1(futo_grid, use_alldiff=False):
     """
     :type futo_grid: list
     :param futo_grid:
+    :param use_alldiff: also post row and column all-different constraints
     :return: csp, variables array
     """
     board_size = (len(futo_grid[0]) + 1) // 2
     # step 1. initialize with set of variables
     # length of futo_grid should equal board_size
     assert (board_size == len(futo_grid))  # for debugging
+    domains = futoshiki_domains(futo_grid)
     cons_unary = [] # unary constraints for variables with variables already set
     vars_all_2d = []
     vars_all_1d = []
@@ -47,8 +98,7 @@ def futoshiki_csp_model_1(futo_grid):
             item_idx = col_idx * 2
             item = row[item_idx]
             var_name = str(row_idx) + ' , ' + str(item_idx//2)  # unique naming scheme named according to position, (row, col)
-            domain = list(range(1, board_size + 1))
-            new_var = Variable(var_name, domain)
+            new_var = Variable(var_name, domains[row_idx][col_idx])
             if item!=0:
                 # get a constraint
                 cons_name = var_name+' unary'
@@ -73,54 +123,50 @@ def futoshiki_csp_model_1(futo_grid):
                 var2 = vars_all_2d[row_idx][col_idx + 1]
                 scope = [var1, var2]
                 name = var1.name + item + var2.name
-                cons = Constraint(name, scope)
-                tuple_list = []
                 if item == '>':
-                    for i in range(1, board_size):
-                        for j in range(i+1, board_size+1):
-                            tuple_list.append((j, i))
-                    cons.add_satisfying_tuples(tuple_list)
+                    cons = LessThanConstraint(name, [var2, var1])
                     new_csp.add_constraint(cons)
                 elif item == '<':
-                    for i in range(1, board_size):
-                        for j in range(i+1, board_size+1):
-                            tuple_list.append((i, j))
-                    cons.add_satisfying_tuples(tuple_list)
+                    cons = LessThanConstraint(name, scope)
                     new_csp.add_constraint(cons)
                 else:
                     raise ValueError("incorrect board character {}".format(item))
 
-    # possible values along row, column
-    pos_vals = list(range(1, board_size + 1))
     # not equal, row
     for row_idx in range(board_size):
-        # all pairs of variables in a row
+        # all unordered pairs of variables in a row (not equal is symmetric)
         for col_idx1 in range(board_size):
             var1 = vars_all_2d[row_idx][col_idx1]
-            for col_idx2 in range(board_size):
-                if col_idx1 != col_idx2:
-                    var2 = vars_all_2d[row_idx][col_idx2]
-                    scope = [var1, var2]
-                    name = var1.name + " not equal " + var2.name
-                    cons = Constraint(name, scope)
-                    tuple_list = list(itertools.permutations(pos_vals, 2))
-                    cons.add_satisfying_tuples(tuple_list)
-                    new_csp.add_constraint(cons)
+            for col_idx2 in range(col_idx1 + 1, board_size):
+                var2 = vars_all_2d[row_idx][col_idx2]
+                scope = [var1, var2]
+                name = var1.name + " not equal " + var2.name
+                cons = NotEqualConstraint(name, scope)
+                new_csp.add_constraint(cons)
 
     # not equal, column
     for col_idx in range(board_size):
-        # all possible pairs in a column
+        # all unordered pairs in a column
         for row_idx1 in range(board_size):
             var1 = vars_all_2d[row_idx1][col_idx]
-            for row_idx2 in range(board_size):
-                if row_idx1 != row_idx2:
-                    var2 = vars_all_2d[row_idx2][col_idx]
-                    scope = [var1, var2]
-                    name = var1.name + " not equal " + var2.name
-                    cons = Constraint(name, scope)
-                    tuple_list = list(itertools.permutations(pos_vals, 2))
-                    cons.add_satisfying_tuples(tuple_list)
-                    new_csp.add_constraint(cons)
+            for row_idx2 in range(row_idx1 + 1, board_size):
+                var2 = vars_all_2d[row_idx2][col_idx]
+                scope = [var1, var2]
+                name = var1.name + " not equal " + var2.name
+                cons = NotEqualConstraint(name, scope)
+                new_csp.add_constraint(cons)
+
+    if use_alldiff:
+        # redundant with the pairs above, but stronger under GAC
+        for row_idx in range(board_size):
+            name = "all-diff row " + str(row_idx)
+            cons = AllDiffConstraint(name, vars_all_2d[row_idx])
+            new_csp.add_constraint(cons)
+        for col_idx in range(board_size):
+            scope = [vars_all_2d[row_idx][col_idx] for row_idx in range(board_size)]
+            name = "all-diff column " + str(col_idx)
+            cons = AllDiffConstraint(name, scope)
+            new_csp.add_constraint(cons)
 
     return new_csp, vars_all_2d
 
@@ -135,6 +181,7 @@ def futoshiki_csp_model_2(futo_grid):
     # step 1. initialize with set of variables
     # length of futo_grid should equal board_size
     assert (board_size == len(futo_grid))  # for debugging
+    domains = futoshiki_domains(futo_grid)
     cons_unary = []
     vars_all_2d = []
     vars_all_1d = []
@@ -145,10 +192,8 @@ def futoshiki_csp_model_2(futo_grid):
             item_idx = col_idx * 2
             item = row[item_idx]
             var_name = str(row_idx) + ' , ' + str(item_idx//2)  # unique naming scheme named according to position, (row, col)
-            domain = list(range(1, board_size + 1))
-            new_var = Variable(var_name, domain)
+            new_var = Variable(var_name, domains[row_idx][col_idx])
             if item != 0:
-                #domain = [item]
                 cons_name = var_name + ' unary'
                 cons_scope = [new_var]
                 new_cons = Constraint(cons_name, cons_scope)
@@ -171,19 +216,11 @@ def futoshiki_csp_model_2(futo_grid):
                 var2 = vars_all_2d[row_idx][col_idx + 1]
                 scope = [var1, var2]
                 name = var1.name + item + var2.name
-                cons = Constraint(name, scope)
-                tuple_list = []
                 if item == '>':
-                    for i in range(1, board_size):
-                        for j in range(i + 1, board_size + 1):
-                            tuple_list.append((j, i))
-                    cons.add_satisfying_tuples(tuple_list)
+                    cons = LessThanConstraint(name, [var2, var1])
                     new_csp.add_constraint(cons)
                 elif item == '<':
-                    for i in range(1, board_size):
-                        for j in range(i + 1, board_size + 1):
-                            tuple_list.append((i, j))
-                    cons.add_satisfying_tuples(tuple_list)
+                    cons = LessThanConstraint(name, scope)
                     new_csp.add_constraint(cons)
                 else:
                     raise ValueError("incorrect board character {}".format(item))
@@ -195,12 +232,8 @@ def futoshiki_csp_model_2(futo_grid):
         for col_idx in range(board_size):
             scope.append(vars_all_2d[row_idx][col_idx])
         name = "all-diff row " + str(row_idx)
-        cons = Constraint(name, scope)
-        pos_vals = list(range(1, board_size + 1))
-        perm = list(itertools.permutations(pos_vals))
-        cons.add_satisfying_tuples(perm)
+        cons = AllDiffConstraint(name, scope)
         new_csp.add_constraint(cons)
-        print("Done")
 
     # not equal, column
     for col_idx in range(board_size):
@@ -208,11 +241,7 @@ def futoshiki_csp_model_2(futo_grid):
         for row_idx in range(board_size):
             scope.append(vars_all_2d[row_idx][col_idx])
         name = "all-diff column " + str(col_idx)
-        cons = Constraint(name, scope)
-        pos_vals = list(range(1, board_size + 1))
-        perm = list(itertools.permutations(pos_vals))
-        cons.add_satisfying_tuples(perm)
+        cons = AllDiffConstraint(name, scope)
         new_csp.add_constraint(cons)
-        print("Done")
 
     return new_csp, vars_all_2d
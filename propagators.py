@@ -72,6 +72,9 @@ var_ordering == a function with the following template
     of the heuristic it implements.
    '''
 
+from collections import deque
+from cspbase import AllDiffConstraint
+
 def prop_BT(csp, newVar=None):
     '''Do plain backtracking propagation. That is, do no 
     propagation at all. Just check fully instantiated constraints'''
@@ -101,28 +104,31 @@ def prop_FC(csp, newVar=None):
     pruned_vals = []
     for c in cons_list:
         if c.get_n_unasgn() == 1:
-            x = c.get_unasgn_vars()[0]
+            # values of the assigned variables, None in the slot of the
+            # one unassigned variable x
+            scope = c.get_scope()
+            vals = [var.get_assigned_value() for var in scope]
+            x_idx = vals.index(None)
+            x = scope[x_idx]
             x_domain = []
-            for idx in range(len(x.curdom)):
-                if x.curdom[idx]:  # true, unpruned
-                    x_domain.append(x.dom[idx])
-            # check
-            if x.cur_domain() == []:
-                return False, []
+            m = x.curdom_mask
+            while m:
+                b = m & -m  # lowest set bit, i.e. next unpruned value
+                x_domain.append(x.dom[b.bit_length() - 1])
+                m ^= b
+            remaining = len(x_domain)
+            if remaining == 0:
+                return False, pruned_vals
             for xVal in x_domain:
-                x.assign(xVal)
-                scope = c.get_scope()
-                vals = []
-                for var in scope:
-                    vals.append(var.get_assigned_value())
-                x.unassign()
+                vals[x_idx] = xVal
                 if not c.check(vals):
                     # prune the value from x
                     x.prune_value(xVal)
                     pruned_vals.append((x,xVal))
-                if x.cur_domain() == []:
-                    # need to return pruned values to un-prune everything
-                    return False, pruned_vals
+                    remaining -= 1
+            if remaining == 0:
+                # need to return pruned values to un-prune everything
+                return False, pruned_vals
     return True, pruned_vals
 
 def prop_GAC(csp, newVar=None):
@@ -130,68 +136,56 @@ def prop_GAC(csp, newVar=None):
        processing all constraints. Otherwise we do GAC enforce with
        constraints containing newVar on GAC Queue'''
     if newVar is None:
-        constraint_queue = csp.get_all_cons()
+        queue = deque(csp.get_all_cons())
     else:
-        constraint_queue = csp.get_cons_with_var(newVar)
+        queue = deque(csp.get_cons_with_var(newVar))
+    in_queue = set(queue)  # constraints currently on the queue
     # begin processing
     pruned_all = []
-    while constraint_queue != []:
-        c, constraint_queue = dequeue(constraint_queue)
+    while queue:
+        c = queue.popleft()
+        in_queue.discard(c)
+        if isinstance(c, AllDiffConstraint):
+            # fast path: Regin's filtering finds all unsupported values at once
+            regin_unsupported = c.unsupported_values()
+        else:
+            regin_unsupported = None
         vars_all = c.get_scope()
         for var in vars_all:
             # check domain to see if there is support, if not then add to prune
             # and add constraints that involve the variable to constraints queue
             if var.is_assigned():
                 continue
-            pruned_count = 0
-            for var_idx in range(len(var.curdom)):
-                if var.curdom[var_idx]:  # in current domain
-                    val = var.dom[var_idx]
-                    if (var, val) not in pruned_all:
-                        if not c.has_support(var, val):
-                            pruned_count += 1
-                            var.prune_value(val)
-                            pruned_all.append((var, val))
-                            cons_with_var = csp.get_cons_with_var(var)
-                            # add constraints that involve the variable to constraints queue
-                            for cv in cons_with_var:
-                                if cv not in constraint_queue or cv.name != c.name:
-                                    constraint_queue = enqueue(constraint_queue, cv)
-                else:
-                    # already pruned
-                    pruned_count += 1
-            if pruned_count == var.domain_size():
-                # number of values pruned from variable is equal to total domain - dead state
+            cur_mask = var.curdom_mask
+            if regin_unsupported is not None:
+                unsupported = regin_unsupported.get(var, [])
+            else:
+                # support for var=val does not depend on var's other values,
+                # so collect the unsupported values first and prune after
+                unsupported = []
+                m = cur_mask
+                while m:
+                    b = m & -m  # lowest set bit, i.e. next value in current domain
+                    m ^= b
+                    val = var.dom[b.bit_length() - 1]
+                    if not c.has_support(var, val):
+                        unsupported.append(val)
+            for val in unsupported:
+                var.prune_value(val)
+                pruned_all.append((var, val))
+            if var.curdom_mask == 0:
+                # every value pruned from variable's domain - dead state
                 return False, pruned_all
+            if var.curdom_mask != cur_mask:
+                # add constraints that involve the variable to constraints queue
+                for cv in csp.get_cons_with_var(var):
+                    if cv not in in_queue:
+                        queue.append(cv)
+                        in_queue.add(cv)
     return True, pruned_all
 
-def enqueue(lst,val):
-    '''
-    enqueue from the back
-    :param lst: list, type list
-    :param val: value
-    :return: list
-    '''
-    lst.append(val)
-    return lst
-
-def dequeue(lst):
-    '''
-    dequeue from the front
-    :param lst:
-    :param val:
-    :return:
-    '''
-    rval = lst.pop(0)
-    return rval, lst
-
-
 def ord_mrv(csp):
     ''' return variable according to the Minimum Remaining Values heuristic '''
-    curr_min = float('inf')  # minimum domain length found so far
-    curr_var = None
-    for var in csp.get_all_unasgn_vars():
-        if var.cur_domain_size() < curr_min:
-            curr_min = var.cur_domain_size()
-            curr_var = var
-    return curr_var
+    # ties go to the first variable, None if every variable is assigned
+    return min(csp.get_all_unasgn_vars(),
+               key=lambda var: var.curdom_mask.bit_count(), default=None)
@@ -136,6 +136,143 @@ def three_queen_FC(stu_propagators):
         details = "One or more runtime errors occurred while testing FC with three queens: %r" % traceback.format_exc()
 
     return score,details
+
+
+def test_alldiff_GAC(stu_propagators):
+    score = 0
+    try:
+        # pigeonhole: a and b use up 1 and 2, so c must be 3
+        a = Variable('A', [1, 2])
+        b = Variable('B', [1, 2])
+        c = Variable('C', [1, 2, 3])
+        csp = CSP("pigeonhole", [a, b, c])
+        csp.add_constraint(AllDiffConstraint("all-diff", [a, b, c]))
+        stu_propagators.prop_GAC(csp)
+        answer = [[1, 2], [1, 2], [3]]
+        var_vals = [x.cur_domain() for x in [a, b, c]]
+
+        # a, b and c form a cycle over 1, 2, 3, so d must be 4
+        a = Variable('A', [1, 2])
+        b = Variable('B', [2, 3])
+        c = Variable('C', [1, 3])
+        d = Variable('D', [1, 2, 3, 4])
+        csp = CSP("cycle", [a, b, c, d])
+        csp.add_constraint(AllDiffConstraint("all-diff", [a, b, c, d]))
+        status, pruned = stu_propagators.prop_GAC(csp)
+        answer2 = [[1, 2], [2, 3], [1, 3], [4]]
+        var_vals2 = [x.cur_domain() for x in [a, b, c, d]]
+
+        # three variables cannot share two values
+        a = Variable('A', [1, 2])
+        b = Variable('B', [1, 2])
+        c = Variable('C', [1, 2])
+        csp = CSP("overfull", [a, b, c])
+        csp.add_constraint(AllDiffConstraint("all-diff", [a, b, c]))
+        status3, pruned3 = stu_propagators.prop_GAC(csp)
+
+        if var_vals != answer or var_vals2 != answer2 or len(pruned) != 3:
+            details = "Failed all-diff GAC test: variable domains don't match expected results"
+        elif status3:
+            details = "Failed all-diff GAC test: did not detect that the constraint has no solution"
+        else:
+            score = 1
+            details = ""
+    except Exception:
+        details = "One or more runtime errors occurred while testing all-diff GAC: %r" % traceback.format_exc()
+
+    return score,details
+
+
+
+def test_binary_GAC(stu_propagators):
+    score = 0
+    try:
+        # x < y, y != z with z = 3: y can only be 2, so x must be 1
+        x = Variable('X', [1, 2, 3])
+        y = Variable('Y', [1, 2, 3])
+        z = Variable('Z', [1, 2, 3])
+        csp = CSP("binary", [x, y, z])
+        csp.add_constraint(LessThanConstraint("X<Y", [x, y]))
+        neq = NotEqualConstraint("Y!=Z", [y, z])
+        csp.add_constraint(neq)
+        z.assign(3)
+        stu_propagators.prop_GAC(csp, newVar=z)
+        answer = [[1], [2], [3]]
+        var_vals = [v.cur_domain() for v in [x, y, z]]
+
+        # a value pruned from y, or other than z's value, has no support
+        unsupported = neq.has_support(y, 3) or neq.has_support(z, 1)
+
+        if var_vals != answer:
+            details = "Failed binary GAC test: variable domains don't match expected results"
+        elif unsupported:
+            details = "Failed binary GAC test: support found for a value not in the current domain"
+        else:
+            score = 1
+            details = ""
+    except Exception:
+        details = "One or more runtime errors occurred while testing binary GAC: %r" % traceback.format_exc()
+
+    return score,details
+
+
+
+def test_futoshiki_domains(stu_propagators):
+    score = 0
+    try:
+        from futoshiki_csp import futoshiki_domains
+        grid = [[1, '<', 0, '.', 0],
+                [0, '.', 0, '.', 0],
+                [0, '>', 0, '.', 0]]
+        answer = [[[1], [2, 3], [2, 3]],
+                  [[2, 3], [1, 2, 3], [1, 2, 3]],
+                  [[2, 3], [1, 2], [1, 2, 3]]]
+        # a given outside 1..N must not be added to the domain
+        bad_grid = [[3, '.', 0],
+                    [0, '.', 0]]
+        bad_answer = [[[], [1, 2]],
+                      [[1, 2], [1, 2]]]
+        if futoshiki_domains(grid) != answer or futoshiki_domains(bad_grid) != bad_answer:
+            details = "Failed futoshiki domains test: domains don't match expected results"
+        else:
+            score = 1
+            details = ""
+    except Exception:
+        details = "One or more runtime errors occurred while testing futoshiki domains: %r" % traceback.format_exc()
+
+    return score,details
+
+
+
+def test_model_1_alldiff(stu_propagators):
+    score = 0
+    try:
+        from futoshiki_csp import futoshiki_csp_model_1
+        # cells (0,0) and (0,1) start as {1, 2}, so (0,2) must be 3; only
+        # the row all-different (not the binary pairs) can deduce this
+        grid = [[0, '.', 0, '.', 0],
+                [3, '.', 0, '.', 0],
+                [0, '.', 3, '.', 0]]
+        csp, var_array = futoshiki_csp_model_1(grid)
+        stu_propagators.prop_GAC(csp)
+        pairs_only = var_array[0][2].cur_domain()
+        csp, var_array = futoshiki_csp_model_1(grid, use_alldiff=True)
+        n_alldiff = sum(1 for c in csp.get_all_cons() if isinstance(c, AllDiffConstraint))
+        stu_propagators.prop_GAC(csp)
+        with_alldiff = var_array[0][2].cur_domain()
+
+        if n_alldiff != 6:
+            details = "Failed model 1 all-diff test: expected one all-diff per row and column"
+        elif pairs_only != [1, 2, 3] or with_alldiff != [3]:
+            details = "Failed model 1 all-diff test: variable domains don't match expected results"
+        else:
+            score = 1
+            details = ""
+    except Exception:
+        details = "One or more runtime errors occurred while testing model 1 with all-diff: %r" % traceback.format_exc()
+
+    return score,details
+
 	
 def main(stu_propagators=None):
     total = 0
@@ -167,7 +304,27 @@ def main(stu_propagators=None):
     total += score
     print(details)
     print("---finished three_queen_GAC---\n")
-    print("Total score %d/4\n" % total)
+    print("---starting test_alldiff_GAC---")
+    score,details = test_alldiff_GAC(stu_propagators)
+    total += score
+    print(details)
+    print("---finished test_alldiff_GAC---\n")
+    print("---starting test_binary_GAC---")
+    score,details = test_binary_GAC(stu_propagators)
+    total += score
+    print(details)
+    print("---finished test_binary_GAC---\n")
+    print("---starting test_futoshiki_domains---")
+    score,details = test_futoshiki_domains(stu_propagators)
+    total += score
+    print(details)
+    print("---finished test_futoshiki_domains---\n")
+    print("---starting test_model_1_alldiff---")
+    score,details = test_model_1_alldiff(stu_propagators)
+    total += score
+    print(details)
+    print("---finished test_model_1_alldiff---\n")
+    print("Total score %d/8\n" % total)
 	
 if __name__=="__main__":
     main()
\ No newline at end of file